@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -94,6 +95,7 @@ DATABASES = {
         "NAME": os.environ.get("DB_NAME"),
         "USER": os.environ.get("DB_USER"),
         "PASSWORD": os.environ.get("DB_PASS"),
+        "TEST": {"NAME": "test_recipe"},
     }
 }
 
@@ -116,6 +118,26 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Use a fast hasher when running tests; PBKDF2 dominates test wall time
+if "test" in sys.argv:
+    PASSWORD_HASHERS = [
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+    ]
+
+    # Only the middleware the tests exercise; security headers, CSRF and
+    # clickjacking protection add per-request overhead without coverage value
+    MIDDLEWARE = [
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.middleware.common.CommonMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "django.contrib.messages.middleware.MessageMiddleware",
+    ]
+
+    # Report lazy loads (N+1 queries) triggered while handling test requests
+    INSTALLED_APPS = INSTALLED_APPS + ["nplusone.ext.django"]
+    MIDDLEWARE = ["nplusone.ext.django.NPlusOneMiddleware"] + MIDDLEWARE
+    NPLUSONE_RAISE = bool(int(os.environ.get("NPLUSONE_RAISE", 0)))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
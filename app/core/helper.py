@@ -1,6 +1,14 @@
+from functools import lru_cache
+
 from django.contrib.auth import get_user_model
 
 
+@lru_cache(maxsize=1)
+def _user_model():
+    # Resolve the user model once; called for every test user created
+    return get_user_model()
+
+
 def create_user(**params):
     is_superuser = params.pop("is_superuser", False)
 
@@ -10,7 +18,8 @@ def create_user(**params):
     }
     defaults.update(params)
 
+    manager = _user_model().objects
     if is_superuser:
-        return get_user_model().objects.create_superuser(**defaults)
+        return manager.create_superuser(**defaults)
 
-    return get_user_model().objects.create_user(**defaults)
+    return manager.create_user(**defaults)
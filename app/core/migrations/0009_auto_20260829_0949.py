@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-08-29 09:49
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_auto_20260829_0948'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='ingredient',
+            options={'ordering': ['-name']},
+        ),
+        migrations.AlterModelOptions(
+            name='tag',
+            options={'ordering': ['-name']},
+        ),
+    ]
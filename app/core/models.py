@@ -70,10 +70,21 @@ class Recipe(models.Model):
     time_minutes = models.IntegerField()
     price = models.DecimalField(max_digits=5, decimal_places=2)
     link = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     tags = models.ManyToManyField("Tag")
     ingredients = models.ManyToManyField("Ingredient")
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
 
+    class Meta:
+        # Serves the list endpoint's user filter and -id ordering with a
+        # single index range scan
+        indexes = [
+            models.Index(
+                fields=["user", "-id"],
+                name="recipe_user_id_desc_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -85,6 +96,17 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
     name = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Matches the list endpoint ordering, backed by the index below
+        ordering = ["-name"]
+        indexes = [
+            models.Index(
+                fields=["user", "-name"],
+                name="tag_user_name_desc_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -97,6 +119,17 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE,
     )
     name = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Matches the list endpoint ordering, backed by the index below
+        ordering = ["-name"]
+        indexes = [
+            models.Index(
+                fields=["user", "-name"],
+                name="ingredient_user_name_desc_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.name
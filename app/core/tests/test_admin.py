@@ -14,36 +14,40 @@ from core.models import Recipe, Tag, Ingredient
 class AdminSiteTests(TestCase):
     # Tests for django admin
 
-    def setUp(self):
-        # Create user and client
-        self.client = Client()
-        self.admin_user = create_user(
+    @classmethod
+    def setUpTestData(cls):
+        # Create shared fixtures once for the whole class
+        cls.admin_user = create_user(
             email="admin@example.com",
             password="testpass1234",
             is_superuser=True,
         )
-        self.client.force_login(self.admin_user)
 
-        self.user = create_user(
+        cls.user = create_user(
             email="user@example.com",
             password="testpass1234",
             name="Test User",
         )
 
-        self.recipe = Recipe.objects.create(
-            user=self.user,
+        cls.recipe = Recipe.objects.create(
+            user=cls.user,
             title="Sample recipe name",
             time_minutes=5,
             price=Decimal("5.50"),
             description="Sample recipe description.",
         )
 
-        self.tag = Tag.objects.create(user=self.user, name="Test Tag")
-        self.ingredient = Ingredient.objects.create(
-            user=self.user,
+        cls.tag = Tag.objects.create(user=cls.user, name="Test Tag")
+        cls.ingredient = Ingredient.objects.create(
+            user=cls.user,
             name="Test Ingredient",
         )
 
+    def setUp(self):
+        # Create client and log in the admin user
+        self.client = Client()
+        self.client.force_login(self.admin_user)
+
     """
     Test User admin starts here
     """
@@ -0,0 +1,59 @@
+"""
+Test for the cached token authentication
+"""
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from rest_framework import exceptions
+from rest_framework.authtoken.models import Token
+
+from core.authentication import CachedTokenAuthentication
+from core.helper import create_user
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    # Test the cached token to user lookup
+
+    def tearDown(self):
+        # Cached users must not leak into other tests
+        cache.clear()
+
+    def test_token_lookup_is_cached(self):
+        # Test repeat authentications skip the token table
+        user = create_user()
+        token = Token.objects.create(user=user)
+        auth = CachedTokenAuthentication()
+
+        with self.assertNumQueries(1):
+            result, _ = auth.authenticate_credentials(token.key)
+        self.assertEqual(result, user)
+
+        with self.assertNumQueries(0):
+            result, _ = auth.authenticate_credentials(token.key)
+        self.assertEqual(result, user)
+
+    def test_deleted_token_is_rejected(self):
+        # Test revoking a token evicts the cached user
+        user = create_user()
+        token = Token.objects.create(user=user)
+        auth = CachedTokenAuthentication()
+        auth.authenticate_credentials(token.key)
+
+        token.delete()
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            auth.authenticate_credentials(token.key)
+
+    def test_deactivated_user_is_rejected(self):
+        # Test deactivating a user evicts their cached tokens
+        user = create_user()
+        token = Token.objects.create(user=user)
+        auth = CachedTokenAuthentication()
+        auth.authenticate_credentials(token.key)
+
+        user.is_active = False
+        user.save()
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            auth.authenticate_credentials(token.key)
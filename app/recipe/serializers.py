@@ -1,3 +1,5 @@
+from django.db import transaction
+
 from rest_framework import serializers
 
 from core.models import Ingredient, Recipe, Tag
@@ -20,10 +22,76 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
+class LabelSerializer(serializers.Serializer):
+    # Response shape of the combined labels endpoint
+    tags = TagSerializer(many=True)
+    ingredients = IngredientSerializer(many=True)
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    # Batch create path for list payloads; one INSERT for the recipes
+    # and one per through table instead of row-by-row saves
+
+    @transaction.atomic
+    def create(self, validated_data):
+        relations = [
+            (item.pop("tags", []), item.pop("ingredients", []))
+            for item in validated_data
+        ]
+        recipes = [Recipe(**item) for item in validated_data]
+        Recipe.objects.bulk_create(recipes, batch_size=500)
+        if any(recipe.pk is None for recipe in recipes):
+            # Backends without INSERT ... RETURNING leave pks unset;
+            # re-fetch this user's new rows in insertion order, scoped
+            # so concurrent creates cannot leak into the mapping
+            recipes = list(
+                Recipe.objects.filter(
+                    user=recipes[0].user,
+                    title__in=[recipe.title for recipe in recipes],
+                ).order_by("-id")[: len(recipes)]
+            )
+            recipes.reverse()
+
+        # Key the rows on their unique pair so duplicate names within an
+        # item collapse, matching add()'s dedupe on the single path
+        tag_rows = {}
+        ingredient_rows = {}
+        for recipe, (tags, ingredients) in zip(recipes, relations):
+            for tag in tags:
+                tag_obj, _ = Tag.objects.get_or_create(
+                    user=recipe.user,
+                    **tag,
+                )
+                tag_rows[(recipe.id, tag_obj.id)] = Recipe.tags.through(
+                    recipe_id=recipe.id,
+                    tag_id=tag_obj.id,
+                )
+            for ingredient in ingredients:
+                ingredient_obj, _ = Ingredient.objects.get_or_create(
+                    user=recipe.user,
+                    **ingredient,
+                )
+                key = (recipe.id, ingredient_obj.id)
+                ingredient_rows[key] = Recipe.ingredients.through(
+                    recipe_id=recipe.id,
+                    ingredient_id=ingredient_obj.id,
+                )
+        Recipe.tags.through.objects.bulk_create(tag_rows.values())
+        Recipe.ingredients.through.objects.bulk_create(
+            ingredient_rows.values()
+        )
+
+        return recipes
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     # Serializer for the recipe object
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
+    # Populated by the view's Count annotations; 0 on instances that were
+    # not loaded through the annotated queryset
+    tag_count = serializers.IntegerField(read_only=True, default=0)
+    ingredient_count = serializers.IntegerField(read_only=True, default=0)
 
     class Meta:
         model = Recipe
@@ -35,8 +103,11 @@ class RecipeSerializer(serializers.ModelSerializer):
             "link",
             "tags",
             "ingredients",
+            "tag_count",
+            "ingredient_count",
         ]
         read_only_fields = ["id"]
+        list_serializer_class = RecipeListSerializer
 
     def _get_or_create_tags(self, tags, recipe):
         # Handle getting or creating tags as needed
@@ -0,0 +1,35 @@
+"""
+Meta test guarding the base classes of the recipe test suites
+"""
+
+import inspect
+import unittest
+
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from recipe.tests import (
+    test_ingredient_api,
+    test_recipe_api,
+    test_tag_api,
+)
+
+
+class TestBaseClasses(SimpleTestCase):
+    # TransactionTestCase flushes the database after every test and is far
+    # slower than TestCase's transaction rollback; no recipe test should
+    # regress to it
+
+    def test_no_transaction_test_case(self):
+        modules = (test_ingredient_api, test_recipe_api, test_tag_api)
+        for module in modules:
+            for name, cls in inspect.getmembers(module, inspect.isclass):
+                if not issubclass(cls, unittest.TestCase):
+                    continue
+                if cls.__module__ != module.__name__:
+                    continue
+                if issubclass(cls, TransactionTestCase):
+                    self.assertTrue(
+                        issubclass(cls, TestCase),
+                        f"{module.__name__}.{name} inherits "
+                        "TransactionTestCase; use TestCase instead",
+                    )
@@ -4,8 +4,9 @@ Test for ingredient APIs
 
 from decimal import Decimal
 
-from django.urls import reverse
-from django.test import TestCase
+from django.core.cache import cache
+from django.urls import reverse, reverse_lazy
+from django.test import Client, SimpleTestCase, TestCase
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -15,7 +16,7 @@ from core.helper import create_user
 
 from recipe.serializers import IngredientSerializer
 
-INGREDIENTS_URL = reverse("recipe:ingredient-list")
+INGREDIENTS_URL = reverse_lazy("recipe:ingredient-list")
 
 
 def detail_url(ingredient_id):
@@ -23,11 +24,12 @@ def detail_url(ingredient_id):
     return reverse("recipe:ingredient-detail", args=[ingredient_id])
 
 
-class PublicIngredientsAPITests(TestCase):
+class PublicIngredientsAPITests(SimpleTestCase):
     # Test unauthenticated ingredient API requests
 
     def setUp(self):
-        self.client = APIClient()
+        # A plain Client is enough; no DRF auth bookkeeping is needed
+        self.client = Client()
 
     def test_auth_required(self):
         # Test auth is required to call API
@@ -38,17 +40,32 @@ class PublicIngredientsAPITests(TestCase):
 
 class PrivateIngredientsAPITests(TestCase):
     # Test authenticated ingredient API requests
+    @classmethod
+    def setUpTestData(cls):
+        # Create the shared user and client once for the whole class
+        cls.user = create_user()
+        cls.api_client = APIClient()
+
     def setUp(self):
-        self.client = APIClient()
-        self.user = create_user()
+        self.client = self.api_client
         self.client.force_authenticate(self.user)
 
+    def tearDown(self):
+        self.client.force_authenticate(None)
+        # Cached list bodies must not leak into other tests
+        cache.clear()
+
     def test_retrieve_ingredients(self):
         # Test retrieving a list of ingredients
-        Ingredient.objects.create(user=self.user, name="Salt")
-        Ingredient.objects.create(user=self.user, name="Pepper")
+        Ingredient.objects.bulk_create(
+            [
+                Ingredient(user=self.user, name="Salt"),
+                Ingredient(user=self.user, name="Pepper"),
+            ]
+        )
 
-        res = self.client.get(INGREDIENTS_URL)
+        with self.assertNumQueries(2):
+            res = self.client.get(INGREDIENTS_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
         ingredients = Ingredient.objects.all().order_by("-name")
@@ -61,7 +78,8 @@ class PrivateIngredientsAPITests(TestCase):
         Ingredient.objects.create(user=other_user, name="Vinegar")
         ingredient = Ingredient.objects.create(user=self.user, name="Chili")
 
-        res = self.client.get(INGREDIENTS_URL)
+        with self.assertNumQueries(2):
+            res = self.client.get(INGREDIENTS_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
         self.assertEqual(len(res.data), 1)
@@ -86,19 +104,20 @@ class PrivateIngredientsAPITests(TestCase):
         res = self.client.delete(url)
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
 
-        ingredients = Ingredient.objects.filter(user=self.user)
-        self.assertFalse(ingredients.exists())
+        self.assertFalse(
+            Ingredient.objects.filter(pk=ingredient.pk).exists()
+        )
 
     def test_filter_ingredients_assigned_to_recipes(self):
         # Test listing ingredients by those assigned to recipes
-        ingredient1 = Ingredient.objects.create(
-            user=self.user,
-            name="Apples",
-        )
-        ingredient2 = Ingredient.objects.create(
-            user=self.user,
-            name="Turkey",
+        Ingredient.objects.bulk_create(
+            [
+                Ingredient(user=self.user, name="Apples"),
+                Ingredient(user=self.user, name="Turkey"),
+            ]
         )
+        ingredient1 = Ingredient.objects.get(name="Apples")
+        ingredient2 = Ingredient.objects.get(name="Turkey")
         recipe = Recipe.objects.create(
             title="Apple Crumble",
             time_minutes=5,
@@ -107,7 +126,8 @@ class PrivateIngredientsAPITests(TestCase):
         )
         recipe.ingredients.add(ingredient1)
 
-        res = self.client.get(INGREDIENTS_URL, {"assigned_only": 1})
+        with self.assertNumQueries(2):
+            res = self.client.get(INGREDIENTS_URL, {"assigned_only": 1})
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
         serializer1 = IngredientSerializer(ingredient1)
@@ -117,22 +137,34 @@ class PrivateIngredientsAPITests(TestCase):
 
     def test_filtered_ingredients_unique(self):
         # Test filtered ingredients return a unique list
-        ingredient = Ingredient.objects.create(user=self.user, name="Salt")
-        Ingredient.objects.create(user=self.user, name="Pepper")
-        recipe1 = Recipe.objects.create(
-            title="Salted Caramel",
-            time_minutes=5,
-            price=Decimal("4.50"),
-            user=self.user,
+        Ingredient.objects.bulk_create(
+            [
+                Ingredient(user=self.user, name="Salt"),
+                Ingredient(user=self.user, name="Pepper"),
+            ]
         )
-        recipe2 = Recipe.objects.create(
-            title="Herb Eggs",
-            time_minutes=20,
-            price=Decimal("4.00"),
-            user=self.user,
+        ingredient = Ingredient.objects.get(name="Salt")
+        Recipe.objects.bulk_create(
+            [
+                Recipe(
+                    title="Salted Caramel",
+                    time_minutes=5,
+                    price=Decimal("4.50"),
+                    user=self.user,
+                ),
+                Recipe(
+                    title="Herb Eggs",
+                    time_minutes=20,
+                    price=Decimal("4.00"),
+                    user=self.user,
+                ),
+            ]
         )
+        recipe1 = Recipe.objects.get(title="Salted Caramel")
+        recipe2 = Recipe.objects.get(title="Herb Eggs")
         recipe1.ingredients.add(ingredient)
         recipe2.ingredients.add(ingredient)
 
-        res = self.client.get(INGREDIENTS_URL, {"assigned_only": 1})
+        with self.assertNumQueries(2):
+            res = self.client.get(INGREDIENTS_URL, {"assigned_only": 1})
         self.assertEqual(len(res.data), 1)
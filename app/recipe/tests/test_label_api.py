@@ -0,0 +1,75 @@
+"""
+Test for the combined label API
+"""
+
+from django.urls import reverse
+from django.test import Client, SimpleTestCase, TestCase
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Tag
+from core.helper import create_user
+
+LABELS_URL = reverse("recipe:label-list")
+
+
+class PublicLabelsAPITests(SimpleTestCase):
+    # Test unauthenticated label API requests
+
+    def setUp(self):
+        # A plain Client is enough; no DRF auth bookkeeping is needed
+        self.client = Client()
+
+    def test_auth_required(self):
+        # Test auth is required to call API
+        res = self.client.get(LABELS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateLabelsAPITests(TestCase):
+    # Test authenticated label API requests
+
+    @classmethod
+    def setUpTestData(cls):
+        # Create the shared user and client once for the whole class
+        cls.user = create_user()
+        cls.api_client = APIClient()
+
+    def setUp(self):
+        self.client = self.api_client
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        self.client.force_authenticate(None)
+
+    def test_retrieve_labels(self):
+        # Test tags and ingredients come back in a single response
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        ingredient = Ingredient.objects.create(user=self.user, name="Salt")
+
+        with self.assertNumQueries(1):
+            res = self.client.get(LABELS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(
+            res.data["tags"],
+            [{"id": tag.id, "name": tag.name}],
+        )
+        self.assertEqual(
+            res.data["ingredients"],
+            [{"id": ingredient.id, "name": ingredient.name}],
+        )
+
+    def test_labels_limited_to_user(self):
+        # Test labels are limited to authenticated user
+        other_user = create_user(email="user2@example.com")
+        Tag.objects.create(user=other_user, name="Fruity")
+        Ingredient.objects.create(user=other_user, name="Vinegar")
+        Tag.objects.create(user=self.user, name="Dessert")
+
+        res = self.client.get(LABELS_URL)
+
+        self.assertEqual(len(res.data["tags"]), 1)
+        self.assertEqual(res.data["ingredients"], [])
@@ -3,8 +3,9 @@ Test for tag APIs
 """
 
 from decimal import Decimal
+from django.core.cache import cache
 from django.urls import reverse
-from django.test import TestCase
+from django.test import Client, SimpleTestCase, TestCase
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -22,11 +23,12 @@ def detail_url(tag_id):
     return reverse("recipe:tag-detail", args=[tag_id])
 
 
-class PublicTagsAPITests(TestCase):
+class PublicTagsAPITests(SimpleTestCase):
     # Test unauthenticated tag API requests
 
     def setUp(self):
-        self.client = APIClient()
+        # A plain Client is enough; no DRF auth bookkeeping is needed
+        self.client = Client()
 
     def test_auth_required(self):
         # Test auth is required for retrieving tags
@@ -38,11 +40,21 @@ class PublicTagsAPITests(TestCase):
 class PrivateTagsAPITests(TestCase):
     # Test authenticated tag API requests
 
+    @classmethod
+    def setUpTestData(cls):
+        # Create the shared user and client once for the whole class
+        cls.user = create_user()
+        cls.api_client = APIClient()
+
     def setUp(self):
-        self.user = create_user()
-        self.client = APIClient()
+        self.client = self.api_client
         self.client.force_authenticate(self.user)
 
+    def tearDown(self):
+        self.client.force_authenticate(None)
+        # Cached list bodies must not leak into other tests
+        cache.clear()
+
     def test_retrieve_tags(self):
         # Test retrieving a list of tags
         Tag.objects.create(user=self.user, name="Vegan")
@@ -55,6 +67,54 @@ class PrivateTagsAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_list_not_modified(self):
+        # Test repeat list calls return 304 when nothing changed
+        Tag.objects.create(user=self.user, name="Vegan")
+
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", res)
+
+        res = self.client.get(
+            TAGS_URL,
+            HTTP_IF_MODIFIED_SINCE=res["Last-Modified"],
+        )
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_etag_not_modified(self):
+        # Test revalidation by ETag, which is exact where Last-Modified
+        # only has whole-second granularity
+        Tag.objects.create(user=self.user, name="Vegan")
+
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("ETag", res)
+
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_etag_changes_on_write(self):
+        # Test a stale ETag gets fresh data, even within the same second
+        Tag.objects.create(user=self.user, name="Vegan")
+
+        res = self.client.get(TAGS_URL)
+        etag = res["ETag"]
+        Tag.objects.create(user=self.user, name="Dessert")
+
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 2)
+
+    def test_repeat_list_uses_cache(self):
+        # Test a repeat list call is served without the row query
+        Tag.objects.create(user=self.user, name="Vegan")
+
+        res = self.client.get(TAGS_URL)
+        with self.assertNumQueries(1):
+            res_repeat = self.client.get(TAGS_URL)
+
+        self.assertEqual(res_repeat.data, res.data)
+
     def test_tags_limited_to_user(self):
         # Test list of tags is limited to auntheticated user
         other_user = create_user(email="user2@example.com")
@@ -110,6 +170,38 @@ class PrivateTagsAPITests(TestCase):
         self.assertIn(serializer1.data, res.data)
         self.assertNotIn(serializer2.data, res.data)
 
+    def test_assigned_only_tracks_link_changes(self):
+        # Test swapping a recipe's tags refreshes the assigned_only
+        # list, which no Tag write would invalidate on its own
+        Tag.objects.bulk_create(
+            [
+                Tag(user=self.user, name="Breakfast"),
+                Tag(user=self.user, name="Lunch"),
+            ]
+        )
+        tag1 = Tag.objects.get(name="Breakfast")
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title="Egg on Toast",
+            time_minutes=10,
+            price=Decimal("5.00"),
+        )
+        recipe.tags.add(tag1)
+
+        res = self.client.get(TAGS_URL, {"assigned_only": 1})
+        self.assertEqual([tag["name"] for tag in res.data], [tag1.name])
+
+        url = reverse("recipe:recipe-detail", args=[recipe.id])
+        res = self.client.patch(
+            url,
+            {"tags": [{"name": "Lunch"}]},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(TAGS_URL, {"assigned_only": 1})
+        self.assertEqual([tag["name"] for tag in res.data], ["Lunch"])
+
     def test_filtered_test_unique(self):
         # Test filtered tags returns a unique list
         tag = Tag.objects.create(user=self.user, name="Breakfast")
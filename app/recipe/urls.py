@@ -16,4 +16,5 @@ router.register("ingredients", views.IngredientViewSet)
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("labels/", views.LabelListView.as_view(), name="label-list"),
 ]
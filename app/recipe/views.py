@@ -1,3 +1,5 @@
+import hashlib
+
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
@@ -11,13 +13,89 @@ from rest_framework import (
 )
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+
+from django.core.cache import cache
+from django.db.models import (
+    CharField,
+    Count,
+    Exists,
+    Max,
+    OuterRef,
+    Prefetch,
+    Value,
+)
+from django.utils.http import http_date, parse_http_date_safe
 
+from core.authentication import CachedTokenAuthentication
 from core.models import Ingredient, Recipe, Tag
 from recipe import serializers
 
 
+class BindAuthUserMixin:
+    # Resolve the lazy request.user once per request; get_queryset can run
+    # several times per dispatch and each access walks the lazy object
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.auth_user = request.user
+
+
+class ConditionalListMixin:
+    # Answer repeat list calls with 304 Not Modified, skipping
+    # serialization entirely. The ETag hashes the exact data
+    # fingerprint; Last-Modified is only consulted when the client
+    # sends no ETag, since its whole-second granularity can hide a
+    # write landing in the same second
+
+    def list_freshness_aggregates(self):
+        # Hook for views whose list payload depends on more rows than
+        # the listed model's own
+        return {}
+
+    def list(self, request, *args, **kwargs):
+        stats = self.filter_queryset(self.get_queryset()).aggregate(
+            latest=Max("updated_at"),
+            total=Count("id", distinct=True),
+            **self.list_freshness_aggregates(),
+        )
+        last_modified = stats.pop("latest")
+        # Any write changes the fingerprint: creates and updates move the
+        # auto_now maximum forward, deletes change the row count
+        self.list_fingerprint = (
+            last_modified.isoformat() if last_modified else None,
+            *[str(stats[key]) for key in sorted(stats)],
+        )
+        etag = '"{}"'.format(
+            hashlib.md5(str(self.list_fingerprint).encode()).hexdigest()
+        )
+
+        timestamp = None
+        if last_modified is not None:
+            timestamp = int(last_modified.timestamp())
+
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+        if if_none_match is not None:
+            if if_none_match == etag:
+                response = Response(status=status.HTTP_304_NOT_MODIFIED)
+                response["ETag"] = etag
+                return response
+        elif timestamp is not None:
+            header = request.META.get("HTTP_IF_MODIFIED_SINCE")
+            if header is not None:
+                since = parse_http_date_safe(header)
+                if since is not None and timestamp <= since:
+                    return Response(status=status.HTTP_304_NOT_MODIFIED)
+
+        response = super().list(request, *args, **kwargs)
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+
+        return response
+
+
 @extend_schema_view(
     list=extend_schema(
         parameters=[
@@ -34,47 +112,122 @@ from recipe import serializers
         ]
     )
 )
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    BindAuthUserMixin,
+    ConditionalListMixin,
+    viewsets.ModelViewSet,
+):
     # View for manage recipe APIs
     serializer_class = serializers.RecipeDetailSerializer
-    queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    # Per-action overrides; anything not listed falls back to
+    # serializer_class
+    serializer_classes = {
+        "list": serializers.RecipeSerializer,
+        "upload_image": serializers.RecipeImageSerializer,
+    }
+    # Placeholder for router/schema introspection; the real queryset is
+    # built per request in get_queryset
+    queryset = Recipe.objects.none()
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def _params_to_ints(self, qs):
         # Convert a list of strings to integers
         return [int(str_id) for str_id in qs.split(",")]
 
+    def list_freshness_aggregates(self):
+        # The list payload embeds tag/ingredient names and counts, which
+        # change without any Recipe write (e.g. renaming a tag), so fold
+        # the related rows into the freshness fingerprint
+        return {
+            "tags_latest": Max("tags__updated_at"),
+            "tags_total": Count("tags", distinct=True),
+            "ingredients_latest": Max("ingredients__updated_at"),
+            "ingredients_total": Count("ingredients", distinct=True),
+        }
+
+    def _annotated_list_qs(self, queryset):
+        # Counts ride along on the main query; per-row .count() calls
+        # would reintroduce an N+1
+        return queryset.annotate(
+            tag_count=Count("tags", distinct=True),
+            ingredient_count=Count("ingredients", distinct=True),
+        )
+
     def get_queryset(self):
         # Retrieve recipes for authenticated user
         tags = self.request.query_params.get("tags")
         ingredients = self.request.query_params.get("ingredients")
-        queryset = self.queryset
+        queryset = Recipe.objects.all()
+        # Filter with Exists subqueries rather than M2M joins; a join
+        # would be reused by the count annotations below and restrict
+        # them to the matching related rows only
         if tags:
             tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = queryset.filter(
+                Exists(
+                    Recipe.tags.through.objects.filter(
+                        recipe_id=OuterRef("pk"),
+                        tag_id__in=tag_ids,
+                    )
+                )
+            )
         if ingredients:
             ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            queryset = queryset.filter(
+                Exists(
+                    Recipe.ingredients.through.objects.filter(
+                        recipe_id=OuterRef("pk"),
+                        ingredient_id__in=ingredient_ids,
+                    )
+                )
+            )
 
-        return (
-            queryset.filter(user=self.request.user)
+        queryset = (
+            queryset.filter(user=self.auth_user)
             .order_by("-id")
             .distinct()
         )
+        if self.action not in ("list", "retrieve"):
+            # Write actions fetch a single row; prefetching is wasted work
+            return queryset
+
+        queryset = self._annotated_list_qs(queryset)
+        # The nested serializers only read id and name, so keep the
+        # prefetch queries narrow
+        queryset = queryset.prefetch_related(
+            Prefetch("tags", queryset=Tag.objects.only("id", "name")),
+            Prefetch(
+                "ingredients",
+                queryset=Ingredient.objects.only("id", "name"),
+            ),
+        )
+        if self.action == "list":
+            # Skip wide columns like description; the list serializer
+            # only reads these fields
+            queryset = queryset.only(
+                "id",
+                "title",
+                "time_minutes",
+                "price",
+                "link",
+            )
+
+        return queryset
 
     def get_serializer_class(self):
         # Return the serializer class for request
-        if self.action == "list":
-            return serializers.RecipeSerializer
-        elif self.action == "upload_image":
-            return serializers.RecipeImageSerializer
+        return self.serializer_classes.get(self.action, self.serializer_class)
 
-        return self.serializer_class
+    def get_serializer(self, *args, **kwargs):
+        # List payloads on create take the batch serializer path
+        if isinstance(kwargs.get("data"), list):
+            kwargs.setdefault("many", True)
+        return super().get_serializer(*args, **kwargs)
 
     def perform_create(self, serializer):
         # Create a new recipe
-        serializer.save(user=self.request.user)
+        serializer.save(user=self.auth_user)
 
     @action(methods=["POST"], detail=True, url_path="upload-image")
     def upload_image(self, request, pk=None):
@@ -98,6 +251,47 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
 
 
+class CachedListMixin:
+    # Serve repeat list calls from the cache. The key embeds the data
+    # fingerprint computed by ConditionalListMixin, so writes move
+    # traffic to a fresh key immediately; no explicit invalidation
+
+    list_cache_timeout = 300
+
+    def list(self, request, *args, **kwargs):
+        # Hash the components: the query string is client-controlled
+        # and unbounded, and raw tuples/querystrings contain characters
+        # that are illegal for backends like memcached
+        digest = hashlib.md5(
+            "{}:{}:{}:{}".format(
+                self.basename,
+                self.auth_user.id,
+                request.query_params.urlencode(),
+                self.list_fingerprint,
+            ).encode()
+        ).hexdigest()
+        key = f"list:{digest}"
+        data = cache.get(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(key, data, self.list_cache_timeout)
+
+        return Response(data)
+
+
+class IteratorListMixin:
+    # Serialize rows straight from iterator() so unpaginated lists never
+    # materialize the whole queryset cache in memory
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer(
+            queryset.iterator(chunk_size=500),
+            many=True,
+        )
+        return Response(serializer.data)
+
+
 @extend_schema_view(
     list=extend_schema(
         parameters=[
@@ -111,37 +305,84 @@ class RecipeViewSet(viewsets.ModelViewSet):
     )
 )
 class BaseRecipeAttrViewSet(
+    BindAuthUserMixin,
+    ConditionalListMixin,
+    CachedListMixin,
+    IteratorListMixin,
     mixins.ListModelMixin,
     mixins.UpdateModelMixin,
     mixins.DestroyModelMixin,
     viewsets.GenericViewSet,
 ):
     # Base viewset for recipe attributes
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def list_freshness_aggregates(self):
+        # assigned_only membership tracks the M2M links, which recipe
+        # writes change without touching any tag/ingredient row; link
+        # edits bump the recipe's auto_now column and cascade deletes
+        # change the link count
+        if not int(self.request.query_params.get("assigned_only", 0)):
+            return {}
+        return {
+            "links_latest": Max("recipe__updated_at"),
+            "links_total": Count("recipe"),
+        }
+
     def get_queryset(self):
         # Retrieve tags for authenticated user
         assigned_only = bool(
             int(self.request.query_params.get("assigned_only", 0))
         )
-        queryset = self.queryset
+        queryset = self.queryset.model.objects.all()
         if assigned_only:
             queryset = queryset.filter(recipe__isnull=False)
-        return (
-            queryset.filter(user=self.request.user)
-            .order_by("-name")
-            .distinct()
-        )
+        # Ordering comes from the model Meta (-name)
+        return queryset.filter(user=self.auth_user).distinct()
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
     # View for manage tag APIs
     serializer_class = serializers.TagSerializer
-    queryset = Tag.objects.all()
+    queryset = Tag.objects.none()
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
     # View for manage ingredient APIs
     serializer_class = serializers.IngredientSerializer
-    queryset = Ingredient.objects.all()
+    queryset = Ingredient.objects.none()
+
+    def get_queryset(self):
+        # Join the user row up front instead of lazy-loading it per item
+        return super().get_queryset().select_related("user")
+
+
+class LabelListView(APIView):
+    # Return the user's tags and ingredients in one response, served by
+    # a single UNION query, so clients populating autocomplete boxes
+    # make one round-trip instead of two
+    authentication_classes = [CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(responses=serializers.LabelSerializer)
+    def get(self, request):
+        def _labelled(queryset, kind):
+            return (
+                queryset.filter(user=request.user)
+                .annotate(kind=Value(kind, output_field=CharField()))
+                .values("id", "name", "kind")
+                .order_by()
+            )
+
+        rows = _labelled(Tag.objects.all(), "tag").union(
+            _labelled(Ingredient.objects.all(), "ingredient"),
+            all=True,
+        ).order_by("-name")
+
+        labels = {"tags": [], "ingredients": []}
+        for row in rows:
+            key = "tags" if row.pop("kind") == "tag" else "ingredients"
+            labels[key].append(row)
+
+        return Response(labels)